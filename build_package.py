@@ -5,6 +5,7 @@ from __future__ import (
     print_function, unicode_literals, division, absolute_import)
 import os
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 from subprocess import run, CalledProcessError
 
 
@@ -26,29 +27,88 @@ def copy_metadata():
     src = os.path.join(common_root, "toolboxes")
     dest = os.path.join(common_root, "help", "gp", "toolboxes")
 
-    if os.path.exists(dest):
-        shutil.rmtree(dest)
+    copied_count = 0
+    for src_dir, _, filenames in os.walk(src):
+        dest_dir = os.path.join(dest, os.path.relpath(src_dir, src))
+        if not os.path.exists(dest_dir):
+            os.makedirs(dest_dir)
 
-    shutil.copytree(src, dest, ignore=shutil.ignore_patterns("*.pyt"))
+        filenames = [fn for fn in filenames if not fn.endswith(".pyt")]
 
-    print("Completed copying metadata XML files")
+        # Remove files that no longer exist in the source folder.
+        for dest_name in os.listdir(dest_dir):
+            dest_path = os.path.join(dest_dir, dest_name)
+            if os.path.isfile(dest_path) and dest_name not in filenames:
+                os.remove(dest_path)
+
+        # Only copy files that are missing or out of date.
+        for filename in filenames:
+            src_path = os.path.join(src_dir, filename)
+            dest_path = os.path.join(dest_dir, filename)
+            if _is_newer(src_path, dest_path):
+                _link_or_copy(src_path, dest_path)
+                copied_count += 1
+
+    # Remove folders that no longer exist in the source folder. Walk
+    # bottom-up so that nested folders are removed before their parents.
+    for dest_dir, _, _ in os.walk(dest, topdown=False):
+        src_dir = os.path.join(src, os.path.relpath(dest_dir, dest))
+        if not os.path.isdir(src_dir):
+            shutil.rmtree(dest_dir)
+
+    print("Completed copying metadata XML files (%d updated)" % copied_count)
+
+
+def _link_or_copy(src_path, dest_path):
+    """Creates a hard link to src_path at dest_path, replacing any existing
+    file. Falls back to copying when a link cannot be created (e.g., the
+    paths are on different volumes).
+    """
+    if os.path.exists(dest_path):
+        os.remove(dest_path)
+    try:
+        os.link(src_path, dest_path)
+    except OSError:
+        shutil.copy2(src_path, dest_path)
+
+
+def _is_newer(src_path, dest_path):
+    """Returns True if dest_path does not exist or is older than src_path.
+    """
+    if not os.path.exists(dest_path):
+        return True
+    return os.path.getmtime(src_path) > os.path.getmtime(dest_path)
 
 
 def main():
     """Builds the distribution files.
     """
     # Packaging tools expects either README.txt, README, or README.rst.
-    # Convert the README markdown file to ReStructured text.
-    try:
-        run("pandoc README.md -f markdown -t rst -o README.rst".split(" "), check=True)
-    except CalledProcessError:
-        print("pandoc does not appear to be installed. Get it from http://pandoc.org/")
-        exit(1)
+    # Convert the README markdown file to ReStructured text, skipping
+    # the conversion if README.rst is already up to date.
+    if _is_newer("README.md", "README.rst"):
+        try:
+            run("pandoc README.md -f markdown -t rst -o README.rst".split(" "), check=True)
+        except CalledProcessError:
+            print("pandoc does not appear to be installed. Get it from http://pandoc.org/")
+            exit(1)
 
     copy_metadata()
 
-    for item in ("sdist", "bdist_wheel"):
-        run(["python", "setup.py", item], check=True)
+    # The source and wheel builds are independent, so run them at the same
+    # time. Both commands write egg-info metadata, so the wheel build is
+    # given its own egg base to keep them from writing the same files.
+    wheel_egg_base = "build"
+    if not os.path.exists(wheel_egg_base):
+        os.makedirs(wheel_egg_base)
+    commands = (
+        ["python", "setup.py", "sdist"],
+        ["python", "setup.py", "egg_info", "--egg-base", wheel_egg_base, "bdist_wheel"]
+    )
+    with ThreadPoolExecutor(max_workers=len(commands)) as executor:
+        futures = [executor.submit(run, command, check=True) for command in commands]
+        for future in futures:
+            future.result()
 
 
 if __name__ == '__main__':
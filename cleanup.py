@@ -5,7 +5,9 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 from os import walk, remove
 from os.path import abspath, dirname, exists, join
 from shutil import rmtree
-import re
+
+# Names (lower-case) of the build output directories that will be removed.
+_BUILD_DIR_NAMES = frozenset(("build", "dist", "wsdotroute.egg-info"))
 
 
 def main():
@@ -17,11 +19,19 @@ def main():
     script_dir = abspath(dirname(__file__))
 
     for dirpath, dirnames, filenames in walk(script_dir):
-        for filename in filter(lambda fn: re.search(r".pyc$", fn, re.I), filenames):
-            remove(join(dirpath, filename))
-
-        for directory_name in filter(lambda dn: re.match(r"^((build)|(dist)|(wsdotroute\.egg-info))$", dn, re.I), dirnames):
-            rmtree(join(dirpath, directory_name))
+        for filename in filenames:
+            if filename.lower().endswith(".pyc"):
+                remove(join(dirpath, filename))
+
+        # Remove build output directories and prune them from dirnames so
+        # that walk does not try to descend into them afterwards.
+        kept_dirnames = []
+        for directory_name in dirnames:
+            if directory_name.lower() in _BUILD_DIR_NAMES:
+                rmtree(join(dirpath, directory_name))
+            else:
+                kept_dirnames.append(directory_name)
+        dirnames[:] = kept_dirnames
 
     help_dir = join(script_dir, "wsdotroute", "esri", "help")
     if exists(help_dir):
@@ -0,0 +1,30 @@
+"""Creates the sample tables used by the unit tests.
+Requires arcpy.
+"""
+
+from __future__ import print_function, division, unicode_literals, absolute_import
+import arcpy
+# numpy is installed along with arcpy.
+import numpy
+
+
+def create_table(table_path, rows, field_types):
+    """Creates a table containing the given rows, writing all of them in a
+    single call.
+
+    Args:
+        table_path: Path of the table to create.
+        rows: A sequence of row tuples.
+        field_types: A sequence of (field name, numpy type code) tuples, in
+            the same order as the row values.
+
+    Returns:
+        Returns the path to the new table.
+    """
+    # numpy on ArcGIS Desktop's Python 2 rejects unicode dtype names,
+    # so convert the names and type codes to native strings.
+    array = numpy.array(rows, dtype=[
+        (str(name), str(type_code)) for name, type_code in field_types
+    ])
+    arcpy.da.NumPyArrayToTable(array, table_path)
+    return table_path
@@ -4,6 +4,7 @@
 from __future__ import print_function, division, unicode_literals, absolute_import
 import unittest
 import os
+from collections import namedtuple
 from shutil import rmtree
 from zipfile import ZipFile
 
@@ -18,38 +19,67 @@ except ImportError:
     # to see if arcpy is truthy, and if it isn't, skip the test.
     arcpy = None
 else:
-    # These modules require arcpy, so we'll only import them
-    # if arcpy is available.
-    from wsdotroute import (add_standardized_route_id_field,
-                            copy_with_segment_ids,
-                            points_to_line_event_features,
-                            standardize_route_id, RouteIdSuffixType)
+    import numpy
+    from sample_tables import create_table
+
+# The wsdotroute functions are imported inside the test methods that use
+# them, so the package is only loaded when a test that needs it runs.
+# pylint:disable=import-outside-toplevel
+
+# Paths to the sample data used by the tests.
+_SAMPLES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Samples")
+_SAMPLE_GDB_ZIP = os.path.join(_SAMPLES_DIR, "SampleData.gdb.zip")
+_SAMPLE_GDB = os.path.join(_SAMPLES_DIR, "Sample.gdb")
+_POINTS_LYR = os.path.join(_SAMPLES_DIR, "CrabBeginAndEndPoints.lyr")
+_ROUTES_LYR = os.path.join(_SAMPLES_DIR, "CrabRoutes.lyr")
 
 class ModuleTest(unittest.TestCase):
     """Defines unit test test case.
     """
 
+    # Field names and rows used to populate the sample route ID table.
+    route_id_field_names = ("RouteID", "Direction")
+    route_id_sample_data = (
+        ("I-5", "d"),
+        ("005", "i")
+    )
+    # Path to the sample route ID table shared by the tests. Tests that
+    # modify the table should work on a copy.
+    route_id_table = None
+
     @classmethod
     def setUpClass(cls):
         if arcpy:
-            # Unzip the sample data.
-            samples_dir = os.path.join(os.path.dirname(__file__), "Samples")
-            zip_path = os.path.join(samples_dir, "SampleData.gdb.zip")
-            gdb_path = os.path.join(samples_dir, "Sample.gdb")
+            cls.route_id_table = cls._create_route_id_table()
 
             # Delete exising sample data GDB
-            if os.path.exists(gdb_path):
-                rmtree(gdb_path)
+            if os.path.exists(_SAMPLE_GDB):
+                rmtree(_SAMPLE_GDB)
 
             # Upzip the zipped GDB, creating a clean copy of the
             # GDB that was just deleted.
-            if os.path.exists(zip_path):
-                with ZipFile(zip_path, "r") as zip_file:
-                    zip_file.extractall(samples_dir)
+            if os.path.exists(_SAMPLE_GDB_ZIP):
+                with ZipFile(_SAMPLE_GDB_ZIP, "r") as zip_file:
+                    zip_file.extractall(_SAMPLES_DIR)
 
     @classmethod
     def tearDownClass(cls):
-        pass
+        if cls.route_id_table and arcpy.Exists(cls.route_id_table):
+            arcpy.management.Delete(cls.route_id_table)
+
+    @classmethod
+    def _create_route_id_table(cls):
+        """Creates an in_memory table containing the sample route ID data.
+
+        Returns:
+            Returns the path to the new table.
+        """
+        return create_table(
+            arcpy.CreateScratchName(workspace="in_memory"),
+            cls.route_id_sample_data, (
+                (cls.route_id_field_names[0], "<U11"),
+                (cls.route_id_field_names[1], "<U2")
+            ))
 
     def skip_if_no_arcpy(self):
         """Skips the current test if arcpy is not installed.
@@ -66,6 +96,9 @@ class ModuleTest(unittest.TestCase):
         """
         if self.skip_if_no_arcpy():
             return
+        from wsdotroute.route_ids import (standardize_route_id, standardize_route_id_or_none,
+                                          RouteIdSuffixType)
+
         in_id = "I-5"
         expected_out = "005i"
         actual_out = standardize_route_id(
@@ -75,18 +108,30 @@ class ModuleTest(unittest.TestCase):
         actual_out = standardize_route_id(in_id)
         self.assertEqual(expected_out, actual_out)
 
+        # Mainline route IDs, with and without direction suffixes.
+        for in_id, suffix_type, expected_out in (
+                ("005", RouteIdSuffixType.has_both_i_and_d, "005i"),
+                ("005d", RouteIdSuffixType.has_both_i_and_d, "005d"),
+                ("005i", RouteIdSuffixType.has_no_suffix, "005"),
+                ("005d", RouteIdSuffixType.has_no_suffix, "005")):
+            self.assertEqual(expected_out, standardize_route_id(in_id, suffix_type))
+
+        # Incorrectly formatted route IDs raise ValueError, or return None
+        # from the non-raising variant.
+        self.assertRaises(ValueError, standardize_route_id, "not a route")
+        self.assertIsNone(standardize_route_id_or_none("not a route"))
+
     def test_create_segment_id_table(self):
         """Tests the copy_with_segment_ids function.
         """
         if self.skip_if_no_arcpy():
             return
+        from wsdotroute import copy_with_segment_ids
 
-        samples_path = os.path.join(os.path.dirname(__file__), "Samples")
-        input_layer = os.path.join(samples_path, "CrabBeginAndEndPoints.lyr")
         output_fc = arcpy.CreateScratchName(workspace="in_memory")
         try:
             row_count, segment_count = copy_with_segment_ids(
-                input_layer, output_fc)
+                _POINTS_LYR, output_fc)
             self.assertTrue(arcpy.Exists(output_fc))
             self.assertEqual(row_count / 2, segment_count)
         finally:
@@ -97,36 +142,31 @@ class ModuleTest(unittest.TestCase):
         """
         if self.skip_if_no_arcpy():
             return
+        from wsdotroute import points_to_line_event_features
 
         try:
-            samples_path = os.path.join(
-                os.path.dirname(__file__), "Samples")
-            input_layer = os.path.join(
-                samples_path, "CrabBeginAndEndPoints.lyr")
-            routes_layer = os.path.join(samples_path, "CrabRoutes.lyr")
             out_table = arcpy.CreateScratchName(workspace="in_memory")
-            points_to_line_event_features(input_layer, routes_layer,
+            points_to_line_event_features(_POINTS_LYR, _ROUTES_LYR,
                                           "RouteID", "50 FEET", out_table)
             self.assertTrue(arcpy.Exists(out_table))
 
-            null_geometry_detected, null_rid, null_m, null_m2 = (False,) * 4
-            # Assertions per row
-            with arcpy.da.SearchCursor(out_table, ("SHAPE@", "RID", "Measure", "EndMeasure")) as cursor:
-                for (shape, rid, measure, end_measure) in cursor:
-                    if not shape:
-                        null_geometry_detected = True
-                    if not rid:
-                        null_rid = True
-                    if measure is None:
-                        null_m = True
-                    if end_measure is None:
-                        null_m2 = True
-                    if null_geometry_detected and null_rid and null_m and null_m2:
-                        break
+            # Geometry can't be loaded into a numpy array, so it is the
+            # only column read with a cursor.
+            with arcpy.da.SearchCursor(out_table, ("SHAPE@",)) as cursor:
+                null_geometry_detected = any(not shape for (shape,) in cursor)
             self.assertFalse(null_geometry_detected, "The output feature class should not contain null geometry.")
-            self.assertFalse(null_rid, "Should not contain null RID values")
-            self.assertFalse(null_m, "No measures should be null")
-            self.assertFalse(null_m2, "No end measures should be null")
+
+            # Load the attributes in one call, replacing nulls with values
+            # that can be tested for across the whole column at once.
+            events = arcpy.da.FeatureClassToNumPyArray(
+                out_table, ("RID", "Measure", "EndMeasure"), null_value={
+                    "RID": "",
+                    "Measure": numpy.nan,
+                    "EndMeasure": numpy.nan
+                })
+            self.assertFalse((events["RID"] == "").any(), "Should not contain null RID values")
+            self.assertFalse(numpy.isnan(events["Measure"]).any(), "No measures should be null")
+            self.assertFalse(numpy.isnan(events["EndMeasure"]).any(), "No end measures should be null")
         finally:
             if out_table and arcpy.Exists(out_table):
                 arcpy.management.Delete(out_table)
@@ -136,56 +176,154 @@ class ModuleTest(unittest.TestCase):
         """
         if self.skip_if_no_arcpy():
             return
+        from wsdotroute import add_standardized_route_id_field, RouteIdSuffixType
 
-        sample_data = [
-            ["I-5", "d"],
-            ["005", "i"]
-        ]
         expected_output = [
             ["I-5", "d", "005d", None],
             ["005", "i", "005i", None]
         ]
 
-        field_names = ("RouteID", "Direction", "MergedRouteId", "Error")
+        field_names = self.route_id_field_names + ("MergedRouteId", "Error")
 
-        # Create table
+        # Copy the shared sample table, since this test adds fields to it.
         table_path = arcpy.CreateScratchName(workspace="in_memory")
         try:
-            # Create sample table
-            workspace, table_name = os.path.split(table_path)
-            arcpy.management.CreateTable(workspace, table_name)
-            try:
-                arcpy.management.AddFields(table_path, [
-                    [field_names[0], "TEXT", None, 11],
-                    [field_names[1], "TEXT", None, None]
-                ])
-            except AttributeError:
-                arcpy.management.AddField(
-                    table_path, field_names[0], "TEXT", field_length=11)
-                arcpy.management.AddField(table_path, field_names[1], "TEXT")
-
-            # Populate the new table.
-            with arcpy.da.InsertCursor(table_path, field_names[0:2]) as cursor:
-                for row in sample_data:
-                    cursor.insertRow(row)
+            arcpy.management.CopyRows(self.route_id_table, table_path)
 
             # Call funciton to add field
             add_standardized_route_id_field(
                 table_path,
                 *(field_names + (RouteIdSuffixType.has_both_i_and_d,)))
 
-            # Check the values
-            with arcpy.da.SearchCursor(table_path, field_names) as cursor:
-                row_count = 0
-                for row in cursor:
-                    expected_row = expected_output[row_count]
-                    for i in range(0, len(expected_row)):
-                        self.assertEqual(row[i], expected_row[i])
-                    row_count += 1
+            # Check the values. Load the whole table in one call and
+            # compare it against the expected output. Null error values
+            # are loaded as empty strings.
+            actual = arcpy.da.TableToNumPyArray(
+                table_path, field_names, null_value={field_names[-1]: ""})
+            expected = numpy.array(
+                [tuple("" if value is None else value for value in row)
+                 for row in expected_output],
+                dtype=actual.dtype)
+            numpy.testing.assert_array_equal(actual, expected)
         finally:
             if arcpy.Exists(table_path):
                 arcpy.management.Delete(table_path)
 
+    def test_field_list_contains(self):
+        """Tests the field_list_contains function's name matching.
+        """
+        if self.skip_if_no_arcpy():
+            return
+        from wsdotroute import field_list_contains
+
+        # Stand-in for arcpy Field objects.
+        Field = namedtuple("Field", ("name", "baseName", "type"))
+        fields = [
+            Field("OBJECTID", "OBJECTID", "OID"),
+            Field("Loc_Error", "Loc_Error", "String"),
+            Field("A.B$", "A.B$", "Double")
+        ]
+
+        # Names are matched regardless of case.
+        self.assertEqual((True, True), field_list_contains(fields, "LOC_ERROR"))
+        self.assertEqual((True, False), field_list_contains(fields, "loc_error", "DOUBLE"))
+        # Regex metacharacters in names are matched literally.
+        self.assertEqual((True, True), field_list_contains(fields, "a.b$", "DOUBLE"))
+        self.assertEqual((False, False), field_list_contains(fields, "AxB", "DOUBLE"))
+
+    def test_feature_dataset_output(self):
+        """Tests locating events into a feature class inside a feature
+        dataset, where the output's parent path is not itself a workspace.
+        """
+        if self.skip_if_no_arcpy():
+            return
+        from wsdotroute import _get_workspace, create_event_feature_class
+
+        route_fc = os.path.join(_SAMPLE_GDB, "StateRouteLRS")
+        event_table = create_table(
+            arcpy.CreateScratchName(workspace="in_memory"),
+            (("005i", 0, 5), ("005i", 20, 100)), (
+                ("RouteID", "<U12"),
+                ("BeginArm", "<f8"),
+                ("EndArm", "<f8")
+            ))
+        gdb_path = arcpy.CreateScratchName(
+            "FdsTest", ".gdb", "Workspace", arcpy.env.scratchFolder)
+        try:
+            gdb_folder, gdb_name = os.path.split(gdb_path)
+            arcpy.management.CreateFileGDB(gdb_folder, gdb_name)
+            fds_path = os.path.join(gdb_path, "Events")
+            arcpy.management.CreateFeatureDataset(
+                gdb_path, "Events", arcpy.Describe(route_fc).spatialReference)
+
+            # The feature dataset resolves to the GDB that contains it.
+            self.assertEqual(os.path.normcase(os.path.normpath(gdb_path)),
+                             os.path.normcase(os.path.normpath(_get_workspace(fds_path))))
+            self.assertEqual(os.path.normcase(os.path.normpath(gdb_path)),
+                             os.path.normcase(os.path.normpath(_get_workspace(gdb_path))))
+
+            out_fc = os.path.join(fds_path, "LocatedEvents")
+            create_event_feature_class(
+                event_table, route_fc, "RouteID", "RouteIdentifier",
+                "BeginArm", "EndArm", out_fc=out_fc)
+            self.assertTrue(arcpy.Exists(out_fc))
+            self.assertEqual(2, int(arcpy.management.GetCount(out_fc)[0]))
+        finally:
+            for path in (gdb_path, event_table):
+                if arcpy.Exists(path):
+                    arcpy.management.Delete(path)
+
+    def test_edit_operation(self):
+        """Tests that _edit_operation edits enterprise geodatabases in a
+        non-versioned edit session, saving the edits when the with block
+        completes and discarding them when it raises an error.
+        """
+        if self.skip_if_no_arcpy():
+            return
+        from wsdotroute import _edit_operation
+
+        calls = []
+
+        class FakeEditor(object):  # pylint:disable=too-few-public-methods
+            """Records the calls made to it in place of arcpy.da.Editor.
+            """
+            def __init__(self, workspace):
+                calls.append(("Editor", workspace))
+
+            def __getattr__(self, name):
+                return lambda *args: calls.append((name,) + args)
+
+        class FakeDescription(object):  # pylint:disable=too-few-public-methods
+            """Stands in for the description of an enterprise geodatabase.
+            """
+            dataType = "Workspace"
+            workspaceType = "RemoteDatabase"
+
+        def fake_describe(path):  # pylint:disable=unused-argument
+            return FakeDescription()
+
+        describe, editor = arcpy.Describe, arcpy.da.Editor
+        arcpy.Describe, arcpy.da.Editor = fake_describe, FakeEditor
+        try:
+            start_calls = [("Editor", "conn.sde"), ("startEditing", False, False),
+                           ("startOperation",)]
+
+            with _edit_operation("conn.sde"):
+                calls.append(("insertRow",))
+            self.assertEqual(start_calls + [("insertRow",), ("stopOperation",),
+                                            ("stopEditing", True)], calls)
+
+            # An error inside the block aborts the operation, discards the
+            # edits, and is re-raised.
+            del calls[:]
+            with self.assertRaises(ValueError):
+                with _edit_operation("conn.sde"):
+                    raise ValueError("Edit failed.")
+            self.assertEqual(start_calls + [("abortOperation",),
+                                            ("stopEditing", False)], calls)
+        finally:
+            arcpy.Describe, arcpy.da.Editor = describe, editor
+
 
 if __name__ == '__main__':
     unittest.main()
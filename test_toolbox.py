@@ -10,15 +10,31 @@ try:
     import arcpy
 except ImportError:
     arcpy = None
+else:
+    from sample_tables import create_table
 
 
 class TestWsdotRoute(unittest.TestCase):
     """Unit tests
     """
 
+    # Field names and rows used to populate the sample event table.
+    event_route_field = "RouteID"
+    event_m_1_field = "BeginArm"
+    event_m_2_field = "EndArm"
+    event_data_rows = (
+        ("005i", 0, 5),
+        ("005i", 20, 100)
+    )
+    # Path to the sample event table shared by the tests. Tests that
+    # modify the table should work on a copy.
+    event_table = None
+
     @classmethod
     def setUpClass(cls):
         if arcpy:
+            cls.event_table = cls._create_event_table()
+
             # Unzip the sample data.
             samples_dir = os.path.join(os.path.dirname(__file__), "Samples")
             zip_path = os.path.join(samples_dir, "SampleData.gdb.zip")
@@ -30,6 +46,26 @@ class TestWsdotRoute(unittest.TestCase):
                 with ZipFile(zip_path, "r") as zip_file:
                     zip_file.extractall(samples_dir)
 
+    @classmethod
+    def tearDownClass(cls):
+        if cls.event_table and arcpy.Exists(cls.event_table):
+            arcpy.management.Delete(cls.event_table)
+
+    @classmethod
+    def _create_event_table(cls):
+        """Creates a table in the scratch GDB containing the sample events.
+
+        Returns:
+            Returns the path to the new table.
+        """
+        return create_table(
+            arcpy.CreateScratchName("Input", None, "Table", arcpy.env.scratchGDB),
+            cls.event_data_rows, (
+                (cls.event_route_field, "<U12"),
+                (cls.event_m_1_field, "<f8"),
+                (cls.event_m_2_field, "<f8")
+            ))
+
     def skip_if_no_arcpy(self):
         """Skips the current test if arcpy is not installed.
         Returns True if skipTest is called, False otherwise.
@@ -56,36 +92,19 @@ class TestWsdotRoute(unittest.TestCase):
             except OSError as ex:
                 msg = 'Error loading toolbox "%s". File exists but could not be loaded.\n%s' % (toolbox_path, ex)
                 self.fail(msg)
-        # Create input event table
         # workspace = "in_memory"  # arcpy.env.scratchGDB
         workspace = arcpy.env.scratchGDB
-        table_path = arcpy.CreateScratchName("Input", None, "Table", workspace)
-        event_route_field = "RouteID"
-        event_m_1_field = "BeginArm"
-        event_m_2_field = "EndArm"
+        table_path = self.event_table
+        event_route_field = self.event_route_field
+        event_m_1_field = self.event_m_1_field
+        event_m_2_field = self.event_m_2_field
         route_layer_route_id_field = "RouteIdentifier"
         route_fc = os.path.join(os.path.split(
             __file__)[0], 'Samples', 'Sample.gdb', 'StateRouteLRS')
         out_fc = arcpy.CreateScratchName(
             "output", data_type="Feature Class", workspace=workspace)
-        data_rows = (
-            ("005i", 0, 5),
-            ("005i", 20, 100)
-        )
+        data_rows = self.event_data_rows
         try:
-            arcpy.management.CreateTable(*os.path.split(table_path))
-            arcpy.management.AddField(table_path, event_route_field, field_type="TEXT",
-                                      field_length=12)
-            arcpy.management.AddField(
-                table_path, event_m_1_field, field_type="DOUBLE")
-            arcpy.management.AddField(
-                table_path, event_m_2_field, field_type="DOUBLE")
-
-            with arcpy.da.InsertCursor(table_path, (event_route_field, event_m_1_field,
-                                                    event_m_2_field)) as cursor:
-                for row in data_rows:
-                    cursor.insertRow(row)
-
             arcpy.wsdotroute.LocateRouteEvents(
                 table_path, route_fc, event_route_field, route_layer_route_id_field,
                 event_m_1_field, event_m_2_field, out_fc=out_fc)
@@ -101,19 +120,22 @@ class TestWsdotRoute(unittest.TestCase):
                              "Output feature class should have %d row(s)." % len(data_rows))
             del get_count_output, out_row_count
 
-            with arcpy.da.SearchCursor(out_fc, ("EventOid", "SHAPE@", "Error")) as cursor:
-                for oid, shape, error in cursor:
-                    self.assertTrue(isinstance(oid, int),
-                                    "OID should be an int")
-                    self.assertTrue(isinstance(shape, arcpy.Polyline) or isinstance(error, str),
+            # Load the attribute values in one call. Only the geometries
+            # need to be read with a cursor.
+            events = arcpy.da.TableToNumPyArray(
+                out_fc, ("EventOid", "Error"), null_value={"Error": ""})
+            self.assertEqual(events.dtype["EventOid"].kind, "i",
+                             "OID should be an int")
+
+            with arcpy.da.SearchCursor(out_fc, ("SHAPE@",)) as cursor:
+                for (shape,), error in zip(cursor, events["Error"]):
+                    self.assertTrue(isinstance(shape, arcpy.Polyline) or error,
                                     "Geometry should be a Polyline")
                     if shape:
                         self.assertGreater(
                             shape.length, 0, "Length should be greater than 0")
 
         finally:
-            if arcpy.Exists(table_path):
-                arcpy.management.Delete(table_path)
             if out_fc and arcpy.Exists(out_fc):
                 arcpy.management.Delete(out_fc)
             if toolbox_path:
@@ -4,19 +4,90 @@ from __future__ import (unicode_literals, print_function, division,
                         absolute_import)
 
 import re
+from collections import Counter
+from contextlib import contextmanager
 from os.path import split as split_path, join as join_path
 import arcpy
-from .route_ids import RouteIdSuffixType, standardize_route_id
+from .route_ids import (INVALID_ROUTE_ID_MESSAGE, RouteIdSuffixType,
+                        standardize_route_id_or_none)
+# Re-exported so that callers can keep importing it from this package.
+from .route_ids import standardize_route_id  # noqa: F401 pylint:disable=unused-import
 try:
     from arcpy.da import Describe
 except ImportError:
     from arcpy import Describe
 
+# ArcGIS Desktop 10.5.1 doesn't have AddFields.
+_HAS_ADD_FIELDS = hasattr(arcpy.management, "AddFields")
+
 
 def _get_row_count(view):
     return int(arcpy.management.GetCount(view)[0])
 
 
+def _get_workspace(path):
+    """Returns the workspace containing a dataset's parent path, walking up
+    past any feature dataset (e.g., "x.gdb/FDS" gives "x.gdb").
+    """
+    workspace = path
+    while arcpy.Describe(workspace).dataType == "FeatureDataset":
+        workspace = split_path(workspace)[0]
+    return workspace
+
+
+@contextmanager
+def _edit_operation(workspace):
+    """Groups the edits made inside the with block into a single edit
+    operation when the workspace is an enterprise geodatabase, so that
+    the DBMS commits once rather than once per row. Other workspaces
+    are edited directly.
+
+    Args:
+        workspace: The workspace or feature dataset containing the data
+            being edited. The data must not be registered as versioned,
+            since the edit session is non-versioned.
+    """
+    workspace = _get_workspace(workspace)
+    if arcpy.Describe(workspace).workspaceType != "RemoteDatabase":
+        yield
+        return
+    editor = arcpy.da.Editor(workspace)
+    # Start a non-versioned edit session without undo/redo. (The
+    # multiuser_mode argument of startEditing is available in both
+    # ArcGIS Desktop and ArcGIS Pro.)
+    editor.startEditing(False, False)
+    editor.startOperation()
+    try:
+        yield
+    except BaseException:
+        editor.abortOperation()
+        editor.stopEditing(False)
+        raise
+    editor.stopOperation()
+    editor.stopEditing(True)
+
+
+def _get_route_geometries(route_layer, route_id_field, spatial_reference=None):
+    """Reads the geometries of all of the routes in a route layer.
+
+    Args:
+        route_layer: Layer or feature class containing route polylines.
+        route_id_field: Name of the route layer's route ID field.
+        spatial_reference: Optional. Spatial reference to read the route
+            geometries in. Defaults to the route layer's own.
+
+    Returns:
+        Returns a dict of route geometry lists keyed by route ID. (There
+        should only be one geometry per route ID, but duplicates are kept.)
+    """
+    route_geometries = {}
+    with arcpy.da.SearchCursor(route_layer, (route_id_field, "SHAPE@"),
+                               spatial_reference=spatial_reference) as cursor:
+        for route_id, geom in cursor:
+            route_geometries.setdefault(route_id, []).append(geom)
+    return route_geometries
+
+
 def add_standardized_route_id_field(in_table, route_id_field, direction_field, out_field_name, out_error_field_name, route_id_suffix_type, wsdot_validation=True):
     """Adds route ID + direction field to event table that has both unsuffixed route ID and direction fields.
     """
@@ -37,19 +108,21 @@ def add_standardized_route_id_field(in_table, route_id_field, direction_field, o
         out_field_length = None
 
     # Add new fields to the output table.
-    if "AddFields" in dir(arcpy.management):
+    if _HAS_ADD_FIELDS:
         arcpy.management.AddFields(in_table, [
             [out_field_name, "TEXT", None, out_field_length, None],
             # Use default length (255)
             [out_error_field_name, "TEXT", None, None]
         ])
     else:
-        # ArcGIS Desktop 10.5.1 doesn't have AddFields, so use multiple AddField calls.
+        # Use multiple AddField calls when AddFields isn't available.
         arcpy.management.AddField(
             in_table, out_field_name, "TEXT", field_length=out_field_length)
         arcpy.management.AddField(in_table, out_error_field_name, "TEXT")
 
-    decrease_re = re.compile(r"^d", re.IGNORECASE)
+    # The suffix type doesn't change from row to row, so test its flags once.
+    has_d_suffix = bool(route_id_suffix_type & RouteIdSuffixType.has_d_suffix)
+    has_i_suffix = bool(route_id_suffix_type & RouteIdSuffixType.has_i_suffix)
 
     with arcpy.da.UpdateCursor(in_table, (route_id_field, direction_field, out_field_name, out_error_field_name)) as cursor:
         for row in cursor:
@@ -57,25 +130,24 @@ def add_standardized_route_id_field(in_table, route_id_field, direction_field, o
             direction = row[1]
             if rid:
                 # Get unsuffixed, standardized route ID.
-                try:
-                    if wsdot_validation:
-                        rid = standardize_route_id(
-                            rid, RouteIdSuffixType.has_no_suffix)
-                except ValueError as error:
-                    row[3] = "%s" % error
+                standardized_rid = rid
+                if wsdot_validation:
+                    standardized_rid = standardize_route_id_or_none(
+                        rid, RouteIdSuffixType.has_no_suffix)
+                if standardized_rid is None:
+                    row[3] = INVALID_ROUTE_ID_MESSAGE % rid
                 else:
-                    # If direction is None, skip regex and set match result to None.
-                    if direction:
-                        match = decrease_re.match(direction)
-                    else:
-                        match = None
+                    rid = standardized_rid
+                    # Direction values starting with "d" (e.g., "d", "DEC")
+                    # indicate decreasing direction. Direction may be None.
+                    is_decrease = bool(direction) and direction[0] in ("d", "D")
 
                     # If direction is "d" and specified suffix type has "d" suffixes, add "d" suffix.
-                    if match and route_id_suffix_type & RouteIdSuffixType.has_d_suffix == RouteIdSuffixType.has_d_suffix:
-                        rid = "%s%s" % (rid, "d")
+                    if is_decrease and has_d_suffix:
+                        rid += "d"
                     # Add the "i" suffix for non-"d" if specified suffix type includes "i" suffixes.
-                    elif route_id_suffix_type & RouteIdSuffixType.has_i_suffix:
-                        rid = "%s%s" % (rid, "i")
+                    elif has_i_suffix:
+                        rid += "i"
                     row[2] = rid
             else:
                 # If no route ID value, add error message to error field.
@@ -83,13 +155,48 @@ def add_standardized_route_id_field(in_table, route_id_field, direction_field, o
             cursor.updateRow(row)
 
 
+def _locate_event(route_geometries, begin_m, end_m=None):
+    """Finds the position or segment of a route event along a route.
+
+    Args:
+        route_geometries: The route polylines with the event's route ID.
+            (There should be only one.)
+        begin_m: The event's measure, or begin measure for a line event.
+        end_m: Optional. The end measure of a line event. If omitted, the
+            event is located as a point.
+
+    Returns:
+        Returns a tuple: (event geometry, error). The geometry is None if
+        the event could not be located, and the error is the last
+        arcpy.ExecuteError raised while trying (or None).
+    """
+    out_geom = None
+    error = None
+    for geom in route_geometries:
+        # find position or segment.
+        try:
+            if end_m is None:
+                out_geom = geom.positionAlongLine(begin_m)
+            else:
+                out_geom = geom.segmentAlongLine(begin_m, end_m)
+        except arcpy.ExecuteError as ex:
+            error = ex
+        # If out geometry has been found, no need to try with other
+        # route features. (There should be only one route feature,
+        # anyway.)
+        if out_geom:
+            return out_geom, None
+    return out_geom, error
+
+
 def create_event_feature_class(event_table,
                                route_layer,
                                event_table_route_id_field,
                                route_layer_route_id_field,
                                begin_measure_field,
                                end_measure_field=None,
-                               out_fc=None):
+                               out_fc=None,
+                               spatial_reference=None):
     """Creates a feature class by locating events along a route layer.
 
     Args:
@@ -102,6 +209,13 @@ def create_event_feature_class(event_table,
             value. If omitted, begin_measure_field will be interpereted as a point along a line
             instead of a line segment.
         out_fc: str, path to output feature class. If omitted, an in_memory FC will be created
+        spatial_reference: Optional. The spatial reference to work in. If omitted, the route
+            layer's spatial reference is read from the route layer. Callers locating several event
+            tables on the same route layer can pass the route layer's spatial reference to avoid
+            describing it each time. The route geometries are read in, and the output feature
+            class is created in, this spatial reference, so passing a different one reprojects
+            the routes and the output. Event measures are distances along the reprojected routes,
+            in this spatial reference's linear units.
 
     Returns:
         Returns the path to the output feature class.
@@ -115,7 +229,8 @@ def create_event_feature_class(event_table,
 
     # End measure is optional. If omitted, out geometry will be points.
     # Otherwise, output will be polyline.
-    if end_measure_field is not None:
+    is_segment = end_measure_field is not None
+    if is_segment:
         fields = ("OID@", event_table_route_id_field,
                   begin_measure_field, end_measure_field)
         out_geo_type = "POLYLINE"
@@ -129,16 +244,16 @@ def create_event_feature_class(event_table,
 
     # Create the output feature class.
     workspace, fc_name = split_path(out_fc)
-    routes_desc = Describe(route_layer)
-
-    # Get the spatial reference from the route layer description.
-    # The method for accessing it will differ in ArcGIS Desktop
-    # and ArcGIS Pro.
-    spatial_reference = None
-    if isinstance(routes_desc, dict):
-        spatial_reference = routes_desc["spatialReference"]
-    else:
-        spatial_reference = routes_desc.spatialReference
+    if spatial_reference is None:
+        routes_desc = Describe(route_layer)
+
+        # Get the spatial reference from the route layer description.
+        # The method for accessing it will differ in ArcGIS Desktop
+        # and ArcGIS Pro.
+        if isinstance(routes_desc, dict):
+            spatial_reference = routes_desc["spatialReference"]
+        else:
+            spatial_reference = routes_desc.spatialReference
 
     arcpy.management.CreateFeatureclass(workspace, fc_name, out_geo_type,
                                         spatial_reference=spatial_reference)
@@ -149,52 +264,52 @@ def create_event_feature_class(event_table,
     arcpy.management.AddField(out_fc, error_field_name, "TEXT", field_is_nullable=True,
                               field_alias="Locating Error")
 
-    with arcpy.da.SearchCursor(event_table, fields) as table_cursor:
+    # Read all of the routes once rather than querying the route layer
+    # for each event.
+    route_geometries = _get_route_geometries(
+        route_layer, route_layer_route_id_field, spatial_reference)
+
+    # Counts of events that could not be located, keyed by route ID.
+    failure_counts = Counter()
+    null_route_id_count = 0
+
+    with arcpy.da.SearchCursor(event_table, fields) as table_cursor, _edit_operation(workspace):
         with arcpy.da.InsertCursor(out_fc, (event_oid_field_name, "SHAPE@",
                                             error_field_name)) as insert_cursor:
             for row in table_cursor:
                 event_oid = row[0]
                 event_route_id = row[1]
                 begin_m = row[2]
-                if len(fields) >= 4:
-                    end_m = row[3]
-                else:
-                    end_m = None
-
-                where = "%s = '%s'" % (
-                    route_layer_route_id_field, event_route_id)
-                out_geom = None
-                error = None
-                with arcpy.da.SearchCursor(route_layer, "SHAPE@", where) as route_cursor:
-                    # Initialize output route event geometry.
-                    for (geom,) in route_cursor:
-                        # find position or segment.
-                        try:
-                            if end_m is None:
-                                out_geom = geom.positionAlongLine(begin_m)
-                            else:
-                                out_geom = geom.segmentAlongLine(
-                                    begin_m, end_m)
-                        except arcpy.ExecuteError as ex:
-                            error = ex
-                            arcpy.AddWarning("Error finding event on route: %s @ %s.\n%s" % (
-                                event_route_id, (begin_m, end_m), ex))
-                        # If out geometry has been found, no need to try with other
-                        # route features. (There should be only one route feature,
-                        # anyway.)
-                        if out_geom:
-                            error = None
-                            break
+                end_m = row[3] if is_segment else None
+
+                if not event_route_id:
+                    insert_cursor.insertRow(
+                        (event_oid, None, "Input Route ID is null"))
+                    null_route_id_count += 1
+                    continue
+
+                out_geom, error = _locate_event(
+                    route_geometries.get(event_route_id, ()), begin_m, end_m)
                 if error:
                     insert_cursor.insertRow((event_oid, None, str(error)))
+                    failure_counts[event_route_id] += 1
                 elif out_geom is None:
                     msg = "Could not locate %s on %s (%s)." % (
                         (begin_m, end_m), event_route_id, event_route_id)
                     insert_cursor.insertRow((event_oid, None, msg))
-                    arcpy.AddWarning(msg)
+                    failure_counts[event_route_id] += 1
                 else:
                     insert_cursor.insertRow((event_oid, out_geom, None))
 
+    # Write one warning per route rather than one per failed event. The
+    # details for each event are in the output's Error field.
+    for route_id, count in failure_counts.most_common():
+        arcpy.AddWarning("%d event(s) could not be located on route %s. See the %s field for details." % (
+            count, route_id, error_field_name))
+    if null_route_id_count:
+        arcpy.AddWarning("%d event(s) have a null route ID." %
+                         null_route_id_count)
+
     return out_fc
 
 
@@ -240,9 +355,11 @@ def field_list_contains(fields, name, field_type="TEXT"):
 
     field_exists = False
     correct_type = False
-    name_re = re.compile("^%s$" % name)
+    # Compare names directly rather than with a regex, which would also
+    # treat characters such as "." or "$" in the name as metacharacters.
+    name = name.lower()
     for field in fields:
-        if name_re.match(field.baseName) or name_re.match(field.name):
+        if field.baseName.lower() == name or field.name.lower() == name:
             field_exists = True
             if type_re.match(field.type):
                 correct_type = True
@@ -281,7 +398,9 @@ def get_measures(in_geometry, route_geometry):
     return out_geometry, p1_info, p2_info
 
 
-def update_route_location(
+# The optional arguments are independent settings, so they are kept as
+# keyword arguments rather than grouped into an options object.
+def update_route_location(  # pylint:disable=too-many-arguments
         in_features,
         route_layer,
         in_features_route_id_field,
@@ -289,7 +408,8 @@ def update_route_location(
         measure_field,
         end_measure_field=None,
         rounding_digits=None,
-        use_m_from_route_point=True):
+        use_m_from_route_point=True,
+        spatial_reference=None):
     """Given input features, finds location nearest route.
 
     Args:
@@ -302,6 +422,12 @@ def update_route_location(
         rounding_digits: The number of digits to round to.
         use_m_from_route_point: If you want to use the M value from the nearest point (rather than the distance returned by
         queryPointAndDistance) set to True. Otherwise, set to False
+        spatial_reference: Optional. The spatial reference to work in. If omitted, the route
+            layer's spatial reference is read from the route layer. Both the route geometries and
+            the input features are read in this spatial reference, so passing one other than the
+            route layer's reprojects them, and the distances written to the output fields are in
+            its linear units. (Unless use_m_from_route_point is False, measures still come from
+            the routes' M values.)
     """
 
     # Convert rounding digits to integer
@@ -316,14 +442,14 @@ def update_route_location(
     distance_1_field = "Distance"
     distance_2_field = "EndDistance"
 
-    route_desc = Describe(route_layer)
     in_features_desc = Describe(in_features)
 
-    if not re.match(r"^(?:(?:Point)|(?:Polyline))$", in_features_desc.shapeType, re.IGNORECASE):
+    if in_features_desc.shapeType.lower() not in ("point", "polyline"):
         raise TypeError(
             "Input feature class must be either Point or Polyline.")
 
-    spatial_ref = route_desc.spatialReference
+    if spatial_reference is None:
+        spatial_reference = Describe(route_layer).spatialReference
 
     def add_output_fields(field_name, field_type, **other_add_field_params):
         field_exists, correct_type = field_list_contains(
@@ -350,57 +476,59 @@ def update_route_location(
                           field_alias="End Distance")
         update_fields += [end_measure_field, distance_2_field]
 
-    # Get search cursor feature count
-    result = arcpy.management.GetCount(in_features)
-    feature_count = int(result.getOutput(0))
-
+    # Count the features while updating them rather than running GetCount,
+    # which would read the table an extra time.
+    feature_count = 0
     error_count = 0
 
-    with arcpy.da.UpdateCursor(in_features, update_fields, "%s IS NOT NULL" % in_features_route_id_field, spatial_ref) as update_cursor:
+    # Read all of the routes once rather than querying the route layer
+    # for each feature.
+    route_geometries = _get_route_geometries(
+        route_layer, route_layer_route_id_field, spatial_reference)
+
+    with arcpy.da.UpdateCursor(in_features, update_fields, "%s IS NOT NULL" % in_features_route_id_field, spatial_reference) as update_cursor:
         for row in update_cursor:
+            feature_count += 1
             in_route_id, event_geometry = row[:2]
 
             if not event_geometry:
                 row[2] = "Event geometry is NULL."
                 continue
 
-            with arcpy.da.SearchCursor(route_layer, ["SHAPE@"], "%s = '%s'" % (route_layer_route_id_field, in_route_id)) as route_cursor:
-                route_geometry = None
-                for route_row in route_cursor:
-                    route_geometry = route_row[0]
-                    updated_geometry, begin_info, end_info = get_measures(
-                        event_geometry, route_geometry)
-
-                    # the updated_geometry is not needed for this.
-                    del updated_geometry
+            route_geometry = route_geometries.get(in_route_id, (None,))[0]
+            if not route_geometry:
+                row[2] = "Route not found"
+                error_count += 1
+            else:
+                updated_geometry, begin_info, end_info = get_measures(
+                    event_geometry, route_geometry)
+
+                # the updated_geometry is not needed for this.
+                del updated_geometry
+
+                # Geometry should not change, so no need to update it.
+                # row[1] = updated_geometry
+                nearest_point, measure, distance, right_side = begin_info
+                if use_m_from_route_point:
+                    measure = nearest_point.firstPoint.M
+                if rounding_digits is not None:
+                    measure = round(measure, rounding_digits)
+                del right_side
+                row[2] = None
+                row[3], row[4] = measure, distance
+                # row[3] = m1
+                # row[5], row[4] = angle_dist1
+                if end_measure_field:
+                    nearest_point, measure, distance, right_side = end_info
+                    del right_side
 
-                    # Geometry should not change, so no need to update it.
-                    # row[1] = updated_geometry
-                    nearest_point, measure, distance, right_side = begin_info
                     if use_m_from_route_point:
                         measure = nearest_point.firstPoint.M
+
                     if rounding_digits is not None:
                         measure = round(measure, rounding_digits)
-                    del right_side
-                    row[2] = None
-                    row[3], row[4] = measure, distance
-                    # row[3] = m1
-                    # row[5], row[4] = angle_dist1
-                    if end_measure_field:
-                        nearest_point, measure, distance, right_side = end_info
-                        del right_side
-
-                        if use_m_from_route_point:
-                            measure = nearest_point.firstPoint.M
-
-                        if rounding_digits is not None:
-                            measure = round(measure, rounding_digits)
-                        row[-2] = measure
-                        row[-1] = distance
-                    break
-                if not route_geometry:
-                    row[2] = "Route not found"
-                    error_count += 1
+                    row[-2] = measure
+                    row[-1] = distance
             update_cursor.updateRow(row)
 
     if error_count:
@@ -4,6 +4,14 @@ Code contained herein does not require arcpy.
 
 from __future__ import absolute_import, division, print_function, unicode_literals
 import re
+try:
+    from functools import lru_cache
+except ImportError:
+    # Python 2 doesn't have lru_cache, so results will not be cached.
+    def lru_cache(maxsize=128):  # pylint:disable=unused-argument
+        """Stand-in for functools.lru_cache that does no caching.
+        """
+        return lambda func: func
 
 # pylint:disable=too-few-public-methods
 
@@ -17,10 +25,51 @@ class RouteIdSuffixType(object):
     has_both_i_and_d = 1 | 2
 
 
+# RE matches a WSDOT route ID with optional direction suffix.
+# Captures route_id and dir groups. The SR, RRT, and RRQ parts are
+# not captured, since only the whole route ID is used.
+_ROUTE_RE = re.compile(
+    r"""^(?P<route_id>
+        # 3-digit mainline route identifier (SR)
+        \d{3}
+        (?: # rrt and rrq may or may not be present
+            # Related roadway type (RRT). Each alternative starts with a
+            # different letter, so at most one of them is tried.
+            (?:
+                AR|
+                C[ODI]|
+                F[STDI]|
+                H[DI]|
+                LX|
+                P[R1-9]|
+                Q[1-9]|
+                R[L1-9]|
+                S[P1-9]|
+                T[BR]|
+                UC
+            )
+            # Related roadway qualifier (RRQ). rrt can exist without rrq.
+            [A-Z0-9]{0,6}
+        )?
+    )(?P<dir>[id]?)$""", re.VERBOSE)
+
+# This RE matches formats such as I-5, US-101, WA-8, or SR-8.
+# The numerical value will be captured.
+_ROUTE_LABEL_RE = re.compile(r"^[A-Z]+[\-\s](\d{0,3})$")
+
+_DIGITS = frozenset("0123456789")
+
+# Message for an incorrectly formatted route ID. Format with the route ID.
+INVALID_ROUTE_ID_MESSAGE = "Incorrectly formatted route_id: %s."
+
+
 def standardize_route_id(route_id, route_id_suffix_type=RouteIdSuffixType.has_both_i_and_d):
     """Converts a route ID string from an event table into
     the format used in the route layer.
 
+    Results are cached, since event tables usually contain the same
+    route IDs many times.
+
     Args:
         route_id: Route ID string from event table.
         route_id_suffix_type: Optional. Indicates what format the route_layer's route IDs are in.
@@ -32,50 +81,66 @@ def standardize_route_id(route_id, route_id_suffix_type=RouteIdSuffixType.has_bo
     Raises:
         ValueError: Incorrectly formatted route_id.
     """
-    # RE matches a WSDOT route ID with optional direction suffix.
-    # Captures route_id, sr, rrt, rrq, and dir groups.
-    route_re = re.compile(
-        r"""^(?P<route_id>
-                    # 3-digit mainline route identifier
-                    (?P<sr>\d{3})
-                    (?: # rrt and rrq may or may not be present
-                        (?P<rrt>
-                            (AR)|
-                            (CO)|
-                            (F[ST])|
-                            (PR)|
-                            (RL)|
-                            (SP)|
-                            (TB)|
-                            (TR)|
-                            (LX)|
-                            ([CFH][DI])|
-                            ([PQRS][1-9])|
-                            (UC)
-                        )
-                        # rrt can exist without rrq.
-                        (?P<rrq>[A-Z0-9]{0,6})
-                    )?
-                )(?P<dir>[id]?)$""", re.VERBOSE)
-    # This RE matches formats such as I-5, US-101, WA-8, or SR-8.
-    # The numerical value will be captured.
-    route_label_format_re = re.compile(r"^[A-Z]+[\-\s](\d{0,3})$")
-
-    match = route_re.match(route_id)
-    if match:
-        unsuffixed_rid = match.group("route_id")
-        direction = match.group("dir")
+    standardized_rid = standardize_route_id_or_none(route_id, route_id_suffix_type)
+    if standardized_rid is None:
+        raise ValueError(INVALID_ROUTE_ID_MESSAGE % route_id)
+    return standardized_rid
+
+
+@lru_cache(maxsize=4096)
+def standardize_route_id_or_none(route_id, route_id_suffix_type=RouteIdSuffixType.has_both_i_and_d):
+    """Same as standardize_route_id, but returns None instead of raising
+    a ValueError for an incorrectly formatted route_id. Use this in loops
+    where invalid route IDs are expected, to avoid the cost of raising
+    and catching an exception for each one.
+
+    Args:
+        route_id: Route ID string from event table.
+        route_id_suffix_type: Optional. Indicates what format the route_layer's route IDs are in.
+            See the RouteIdSuffixType values. Defaults to RouteIdSuffixType.has_both_i_and_d.
+
+    Returns:
+        str: equivalent of the input route id in the output format, or
+        None if route_id is incorrectly formatted.
+    """
+    parts = _split_route_id(route_id)
+    if parts:
+        unsuffixed_rid, direction = parts
         if route_id_suffix_type == RouteIdSuffixType.has_no_suffix:
             return unsuffixed_rid
-        if direction:
-            return "%s%s" % (unsuffixed_rid, direction)
-        return "%si" % unsuffixed_rid
-    else:
-        match = route_label_format_re.match(route_id)
-        if not match:
-            raise ValueError("Incorrectly formatted route_id: %s." % route_id)
-        # Pad route number to three digits.
-        unsuffixed_rid = match.group(1).rjust(3, "0")
-        if route_id_suffix_type & RouteIdSuffixType.has_i_suffix == RouteIdSuffixType.has_i_suffix:
-            return "%si" % unsuffixed_rid
-        return unsuffixed_rid
+        return unsuffixed_rid + (direction or "i")
+
+    match = _ROUTE_LABEL_RE.match(route_id)
+    if not match:
+        return None
+    # Pad route number to three digits.
+    unsuffixed_rid = match.group(1).rjust(3, "0")
+    if route_id_suffix_type & RouteIdSuffixType.has_i_suffix == RouteIdSuffixType.has_i_suffix:
+        return unsuffixed_rid + "i"
+    return unsuffixed_rid
+
+
+def _split_route_id(route_id):
+    """Splits a route ID in the route layer's format into its unsuffixed
+    route ID and its direction suffix.
+
+    Args:
+        route_id: Route ID string from event table.
+
+    Returns:
+        tuple: (unsuffixed route ID, direction) where direction is "i",
+        "d", or "" if there is no suffix. Returns None if route_id is not
+        in this format (e.g., a route label such as "I-5").
+    """
+    # Mainline route IDs (e.g., "005", "005i", "005d") make up most event
+    # table rows, so handle them without running the regular expression.
+    id_length = len(route_id)
+    if (id_length == 3 or (id_length == 4 and route_id[3] in "id")) and _DIGITS.issuperset(route_id[:3]):
+        return route_id[:3], route_id[3:]
+
+    # Route labels (e.g., "I-5", "US-101") start with a letter, which
+    # _ROUTE_RE can never match, so it isn't run for them.
+    match = None if route_id[:1].isalpha() else _ROUTE_RE.match(route_id)
+    if not match:
+        return None
+    return match.group("route_id"), match.group("dir")